@@ -4,8 +4,10 @@ import logging
 import os
 import pathlib
 import platform
+import tempfile
 import types
 import unittest
+import unittest.mock
 
 from encrypted_config.json_io import json_to_file
 import timing
@@ -16,7 +18,8 @@ from transpyle.general.binder import Binder
 from transpyle.cpp.parser import CppParser
 from transpyle.cpp.ast_generalizer import CppAstGeneralizer
 from transpyle.cpp.unparser import Cpp14Unparser
-from transpyle.cpp.compiler import CppSwigCompiler
+from transpyle.cpp.compiler import \
+    CppSwigCompiler, create_build_paths, create_python_pch, update_copy
 from transpyle.cpp.compiler_interface import GppInterface
 
 from .common import \
@@ -108,6 +111,91 @@ class CompilerTests(unittest.TestCase):
             with self.subTest(library_path=library_path):
                 self.assertTrue(library_path.is_dir())
 
+    def test_create_build_paths(self):
+        output_folder = pathlib.Path('build')
+        paths = create_build_paths(
+            output_folder, 'bundle', [pathlib.Path('src', 'a.cpp'), pathlib.Path('b.cc')])
+        self.assertEqual(paths.cpp, tuple(output_folder.joinpath(_) for _ in ('a.cpp', 'b.cc')))
+        self.assertEqual(paths.hpp, tuple(output_folder.joinpath(_) for _ in ('a.hpp', 'b.hpp')))
+        self.assertEqual(paths.wrapper, output_folder.joinpath('bundle_wrap.cxx'))
+
+    def test_try_create_clashing_build_paths(self):
+        for source_paths in ([pathlib.Path('a.cpp'), pathlib.Path('a.cc')],
+                             [pathlib.Path('a.cpp'), pathlib.Path('src', 'a.cpp')],
+                             [pathlib.Path('bundle_wrap.cpp')]):
+            with self.subTest(source_paths=source_paths):
+                with self.assertRaises(ValueError):
+                    create_build_paths(pathlib.Path('build'), 'bundle', source_paths)
+
+    def test_update_copy(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            copy_path = pathlib.Path(tmp_dir, 'copy.cpp')
+            update_copy('int x;\n', copy_path)
+            self.assertEqual(copy_path.read_text(), 'int x;\n')
+            os.utime(str(copy_path), ns=(0, 0))
+            update_copy('int x;\n', copy_path)
+            self.assertEqual(copy_path.stat().st_mtime_ns, 0)
+            update_copy('int y;\n', copy_path)
+            self.assertEqual(copy_path.read_text(), 'int y;\n')
+            update_copy('int xyz;\n', copy_path)
+            self.assertEqual(copy_path.read_text(), 'int xyz;\n')
+
+    def test_cached_header_file(self):
+        input_path = EXAMPLES_ROOTS['cpp14'].joinpath('addition.cpp')
+        code_reader = CodeReader()
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache_root = pathlib.Path(cache_dir)
+            with unittest.mock.patch('transpyle.cpp.compiler.CACHE_PATH', cache_root):
+                compiler = CppSwigCompiler(use_cache=False)
+                header_code = compiler.create_header_file(input_path)
+                self.assertEqual(list(cache_root.rglob('*.hpp')), [])
+
+                compiler = CppSwigCompiler()
+                self.assertEqual(compiler.create_header_file(input_path), header_code)
+                cache_paths = list(cache_root.rglob('*.hpp'))
+                self.assertEqual(len(cache_paths), 1)
+                self.assertEqual(code_reader.read_file(cache_paths[0]), header_code)
+
+                with cache_paths[0].open('w') as cache_file:
+                    cache_file.write('// cached header\n')
+                self.assertEqual(compiler.create_header_file(input_path), '// cached header\n')
+
+    def test_cached_header_file_of_changed_code(self):
+        input_path = EXAMPLES_ROOTS['cpp14'].joinpath('addition.cpp')
+        code_reader = CodeReader()
+        code = code_reader.read_file(input_path)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_root = pathlib.Path(tmp_dir)
+            with unittest.mock.patch('transpyle.cpp.compiler.CACHE_PATH', tmp_root):
+                compiler = CppSwigCompiler()
+                path = tmp_root.joinpath(input_path.name)
+                path.write_text(code)
+                header_code = compiler.create_header_file(path)
+                path.write_text(code.replace('add(', 'plus('))
+                changed_header_code = compiler.create_header_file(path)
+        self.assertNotEqual(changed_header_code, header_code)
+        self.assertIn('plus(', changed_header_code)
+
+    @unittest.skipUnless(platform.system() == 'Linux', 'tested only on Linux')
+    def test_python_pch_failure_is_remembered(self):
+        compiler = GppInterface()
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with unittest.mock.patch('transpyle.cpp.compiler.CACHE_PATH', pathlib.Path(cache_dir)):
+                with unittest.mock.patch.object(
+                        compiler, 'run_compiler', wraps=compiler.run_compiler) as run_compiler:
+                    with self.assertLogs(level=logging.WARNING):
+                        self.assertIsNone(create_python_pch(compiler, ['-fno-such-flag']))
+                    self.assertIsNone(create_python_pch(compiler, ['-fno-such-flag']))
+        self.assertEqual(run_compiler.call_count, 1)
+
+    def test_try_create_header_file_from_different_code(self):
+        input_path = EXAMPLES_ROOTS['cpp14'].joinpath('addition.cpp')
+        code_reader = CodeReader()
+        code = code_reader.read_file(input_path)
+        compiler = CppSwigCompiler(use_cache=False)
+        with self.assertRaises(ValueError):
+            compiler.create_header_file_from_code(code.replace('add(', 'plus('), input_path)
+
     @unittest.skipUnless(platform.system() == 'Linux', 'tested only on Linux')
     @unittest.skipUnless(os.environ.get('TEST_LONG'), 'skipping long test')
     @execute_on_language_examples('cpp14')
@@ -131,6 +219,32 @@ class CompilerTests(unittest.TestCase):
         except OSError:
             pass
 
+    @unittest.skipUnless(platform.system() == 'Linux', 'tested only on Linux')
+    @unittest.skipUnless(os.environ.get('TEST_LONG'), 'skipping long test')
+    def test_compile_many(self):
+        input_paths = [EXAMPLES_ROOTS['cpp14'].joinpath(name)
+                       for name in ('addition.cpp', 'compute_pi.cpp', 'do_nothing.cpp')]
+        output_dir = make_swig_tmp_folder(input_paths[0])
+
+        code_reader = CodeReader()
+        sources = [(code_reader.read_file(input_path), input_path) for input_path in input_paths]
+        compiler = CppSwigCompiler()
+        with _TIME.measure('compile_many') as timer:
+            output_path = compiler.compile_many(sources, output_dir)
+        self.assertEqual(output_path, output_dir.joinpath('bundle.py'))
+        binder = Binder()
+        with binder.temporarily_bind(output_path) as binding:
+            self.assertEqual(binding.add(2, 3), 5)
+            self.assertAlmostEqual(binding.compute_pi(10), 3.14159, places=4)
+            self.assertIsNone(binding.do_nothing())
+        _LOG.warning('compiled %i files in %fs', len(input_paths), timer.elapsed)
+
+        output_path.unlink()
+        try:
+            output_dir.rmdir()
+        except OSError:
+            pass
+
     def test_try_compile_invalid(self):
         input_path = EXAMPLES_ROOT.joinpath('invalid', 'invalid_cpp.cpp')
         output_dir = make_swig_tmp_folder(input_path)
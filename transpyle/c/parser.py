@@ -202,19 +202,18 @@ class C99Parser(Parser):
 
         if includes:
             preprocessed_code = '{}\n{}'.format(includes, preprocessed_code)
-            with tempfile.TemporaryDirectory() as tmpdir:
+            with tempfile.TemporaryDirectory(prefix='transpyle_') as tmpdir:
                 output_folder = pathlib.Path(tmpdir)
-            output_folder.mkdir()
-            _LOG.warning('running C preprocessor on file in "%s"', output_folder)
-            intermediate_path = output_folder.joinpath(path.name)
-            CodeWriter(path.suffix).write_file(preprocessed_code, intermediate_path)
-            output_path = output_folder.joinpath(
-                '{}{}{}'.format(path.stem, '_preprocessed', path.suffix))
-            run_tool(pathlib.Path('gcc'), [
-                '-I', str(TRANSPYLE_C_RESOURCES_PATH), '-o', output_path, '-E', intermediate_path],
-                     cwd=output_folder)
-            preprocessed_code = CodeReader().read_file(output_path)
-            path_str = str(output_path)
+                _LOG.warning('running C preprocessor on file in "%s"', output_folder)
+                intermediate_path = output_folder.joinpath(path.name)
+                CodeWriter(path.suffix).write_file(preprocessed_code, intermediate_path)
+                output_path = output_folder.joinpath(
+                    '{}{}{}'.format(path.stem, '_preprocessed', path.suffix))
+                run_tool(pathlib.Path('gcc'), [
+                    '-I', str(TRANSPYLE_C_RESOURCES_PATH), '-o', output_path, '-E',
+                    intermediate_path])
+                preprocessed_code = CodeReader().read_file(output_path)
+                path_str = str(output_path)
 
         # parse
         tree = self._parser.parse(preprocessed_code, path_str)
@@ -31,6 +31,13 @@ LOGTS_PATHS = {
 
 LOGS_PATH = LOGTS_PATHS[platform.system()]
 
+CACHE_PATHS = {
+    'Linux': pathlib.Path('~', '.cache', APP_DIRNAME),
+    'Darwin': pathlib.Path('~', 'Library', 'Caches', APP_DIRNAME),
+    'Windows': pathlib.Path('%LOCALAPPDATA%', APP_DIRNAME, 'cache')}
+
+CACHE_PATH = CACHE_PATHS[platform.system()]
+
 
 def logging_level_from_envvar(envvar: str, default: int = logging.WARNING) -> int:
     """Translate text envvar into an integer corresponding to a logging level."""
@@ -1,19 +1,26 @@
 """"Compiling of C++."""
 
+import functools
+import hashlib
 import logging
+import os
 import pathlib
 import platform
-import shutil
+import re
 import subprocess
 import tempfile
 import typing as t
 
 import argunparse
+from encrypted_config import normalize_path
 
+from ..configuration import CACHE_PATH
 from ..general import \
-    temporarily_change_dir, run_tool, \
-    Language, CodeReader, Parser, AstGeneralizer, Unparser, Compiler
-from .compiler_interface import GppInterface, ClangppInterface
+    run_tool, Language, CodeReader, Parser, AstGeneralizer, Unparser, Compiler, CompilerInterface
+from .parser import CASTXML_PATH, CASTXML_CC_GNU
+from .compiler_interface import CCACHE_PCH_ENV, GppInterface, ClangppInterface
+
+LOCAL_INCLUDE_PATTERN = re.compile(r'^\s*#\s*include\s*"([^"]+)"', re.MULTILINE)
 
 SWIG_INTERFACE_TEMPLATE = '''/* File: {module_name}.i */
 /* Generated by transpyle. */
@@ -47,7 +54,7 @@ SWIG_INTERFACE_TEMPLATE_HPP = '''/* File: {module_name}.i */
 
 %{{
 #define SWIG_FILE_WITH_INIT
-#include "{include_path}"
+{include_directives}
 %}}
 
 %include "numpy.i"
@@ -69,7 +76,7 @@ namespace std {{
     %template(vector_double) vector<double>;
 }}
 
-%include "{include_path}"
+{include_statements}
 
 // below is Python 3 support, however,
 // adding it will generate wrong .so file
@@ -81,6 +88,11 @@ namespace std {{
 %}}
 '''
 
+PYTHON_PCH_HEADER = '''/* Generated by transpyle. */
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+'''
+
 _HERE = pathlib.Path(__file__).resolve().parent
 
 TRANSPYLE_CPP_RESOURCES_PATH = _HERE.joinpath('..', 'resources', 'cpp').resolve()
@@ -89,54 +101,224 @@ assert TRANSPYLE_CPP_RESOURCES_PATH.is_dir(), TRANSPYLE_CPP_RESOURCES_PATH
 
 _LOG = logging.getLogger(__name__)
 
+BuildPaths = t.NamedTuple('BuildPaths', [
+    ('cpp', t.Tuple[pathlib.Path, ...]), ('hpp', t.Tuple[pathlib.Path, ...]),
+    ('interface', pathlib.Path), ('wrapper', pathlib.Path), ('library', pathlib.Path),
+    ('module', pathlib.Path)])
+
+
+def create_build_paths(output_folder: pathlib.Path, module_name: str,
+                       source_paths: t.Sequence[pathlib.Path]) -> BuildPaths:
+    """Compute paths of all files involved in building given sources into a SWIG module."""
+    # headers and object files are named after the stem, as is the object file of the wrapper
+    stems = [path.stem for path in source_paths] + [module_name + '_wrap']
+    if len(set(stems)) != len(stems):
+        raise ValueError('stems of sources {} are not unique or clash with module "{}" wrapper'
+                         .format(source_paths, module_name))
+    cpp_paths = tuple(output_folder.joinpath(path.name) for path in source_paths)
+    return BuildPaths(
+        cpp=cpp_paths, hpp=tuple(cpp_path.with_suffix('.hpp') for cpp_path in cpp_paths),
+        interface=output_folder.joinpath(module_name + '.i'),
+        wrapper=output_folder.joinpath(module_name + '_wrap.cxx'),
+        library=output_folder.joinpath('_' + module_name + '.so'),
+        module=output_folder.joinpath(module_name + '.py'))
+
+
+@functools.lru_cache()
+def compiler_version(executable: pathlib.Path) -> str:
+    """Get full version of a GCC-compatible compiler."""
+    result = run_tool(executable, ['-dumpfullversion', '-dumpversion'])
+    return result.stdout.strip()
+
+
+def create_python_pch(cpp_compiler: CompilerInterface, flags: t.Sequence[str] = ()
+                      ) -> t.Optional[pathlib.Path]:
+    """Create a precompiled "Python.h" header, unless it is already cached.
+
+    The header is compiled with the same flags and options as the compile step of the given
+    compiler (plus given extra flags) and it is cached in a folder specific to them and to the
+    compiler version, since GCC rejects headers precompiled by other versions. A lock file
+    guards the build, so that concurrent compilations do not race. A failure is recorded in the
+    same folder, so that it is not retried on every compilation.
+
+    Return path to the header, to be used via "-include" option, or None if it cannot be created.
+    """
+    import fcntl
+
+    args = [*cpp_compiler.flags('compile'), *cpp_compiler.options('compile'), *flags]
+    executable = cpp_compiler.executable('compile')
+    key = hashlib.sha256('\n'.join([
+        str(executable), compiler_version(executable), *args]).encode())
+    pch_folder = normalize_path(CACHE_PATH).joinpath('pch', key.hexdigest()[:32])
+    header_path = pch_folder.joinpath('python.hpp')
+    pch_path = pch_folder.joinpath('python.hpp.gch')
+    failure_path = pch_folder.joinpath('python.hpp.gch.failed')
+    pch_folder.mkdir(parents=True, exist_ok=True)
+    with pch_folder.joinpath('.lock').open('w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        if pch_path.is_file():
+            return header_path
+        if failure_path.is_file():
+            _LOG.debug('precompiling "%s" failed before, continuing without it', header_path)
+            return None
+        with header_path.open('w') as header_file:
+            header_file.write(PYTHON_PCH_HEADER)
+        partial_pch_path = pch_folder.joinpath('python.hpp.gch.partial')
+        try:
+            cpp_compiler.run_compiler([
+                *args, '-x', 'c++-header', str(header_path), '-o', str(partial_pch_path)],
+                env=CCACHE_PCH_ENV)
+        except RuntimeError:
+            _LOG.warning('failed to precompile "%s", continuing without it', header_path,
+                         exc_info=True)
+            failure_path.touch()
+            return None
+        os.replace(str(partial_pch_path), str(pch_path))
+    _LOG.info('created precompiled header "%s"', pch_path)
+    return header_path
+
+
+def update_copy(code: str, copy_path: pathlib.Path) -> None:
+    """Make sure copy_path contains given code, unless it already does.
+
+    Existing file is compared by size first and then by contents, and is rewritten only if it
+    differs.
+    """
+    data = code.encode()
+    if copy_path.exists():
+        if copy_path.stat().st_size == len(data) and copy_path.read_bytes() == data:
+            return
+    copy_path.write_bytes(data)
+
+
+def distribution_version(name: str) -> str:
+    """Get version of an installed distribution, or an empty string if it is not installed."""
+    try:
+        import importlib.metadata as metadata
+    except ImportError:  # Python < 3.8
+        import pkg_resources
+        try:
+            return pkg_resources.get_distribution(name).version
+        except pkg_resources.DistributionNotFound:
+            return ''
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return ''
+
+
+@functools.lru_cache()
+def header_generator_digest() -> str:
+    """Compute a digest of everything apart from the source code that generated headers depend on.
+
+    That is: versions of transpyle and of the AST libraries it relies on, versions of CastXML and
+    of the compiler providing its system headers, and code of all C++ and general modules.
+    """
+    digest = hashlib.sha256()
+    for name in ('transpyle', 'horast', 'typed-ast', 'typed-astunparse'):
+        digest.update('{}=={}\n'.format(name, distribution_version(name)).encode())
+    digest.update(run_tool(CASTXML_PATH, ['--version']).stdout.encode())
+    if CASTXML_CC_GNU is not None:
+        digest.update(run_tool(pathlib.Path(CASTXML_CC_GNU), ['--version']).stdout.encode())
+    package_path = pathlib.Path(__file__).resolve().parent.parent
+    for module_path in sorted([*package_path.joinpath('cpp').glob('*.py'),
+                               *package_path.joinpath('general').glob('*.py')]):
+        digest.update(module_path.read_bytes())
+    return digest.hexdigest()
+
 
 class SwigCompiler(Compiler):
 
     # TODO: create SWIG compiler interface similarily to F2PY interface
 
-    """SWIG-based compiler."""
+    """SWIG-based compiler.
 
-    def __init__(self, language: Language):
+    Generated headers are cached on disk unless use_cache is False or environment variable
+    TRANSPYLE_NO_HEADER_CACHE is set to a non-empty value.
+    """
+
+    def __init__(self, language: Language, use_cache: bool = True):
         super().__init__()
         self.language = language
         self.argunparser = argunparse.ArgumentUnparser()
+        self._code_reader = CodeReader()
+        self._parser = Parser.find(language)()
+        # generalizer is stateful and its scope depends on the path, so only its class is cached
+        self._ast_generalizer_class = AstGeneralizer.find(language)
+        self._unparser = Unparser.find(language)(headers=True)
+        self.use_cache = use_cache and not os.environ.get('TRANSPYLE_NO_HEADER_CACHE')
+
+    def _header_cache_path(self, code: str, path: pathlib.Path) -> pathlib.Path:
+        # the folder is not part of the key, so that copies in temporary output folders share
+        # the cache entry, but contents of local headers included by the code are
+        key = hashlib.sha256('\n'.join([
+            header_generator_digest(), str(self.language), path.name, code]).encode())
+        for include_name in LOCAL_INCLUDE_PATTERN.findall(code):
+            include_path = path.parent.joinpath(include_name)
+            if include_path.is_file():
+                key.update(include_path.read_bytes())
+        return normalize_path(CACHE_PATH).joinpath('headers', key.hexdigest()[:32] + '.hpp')
 
     def create_header_file(self, path: pathlib.Path) -> str:
         """Create a header for a given C/C++ source code file."""
-        code_reader = CodeReader()
-        parser = Parser.find(self.language)()
-        ast_generalizer = AstGeneralizer.find(self.language)({'path': path})
-        unparser = Unparser.find(self.language)(headers=True)
-        code = code_reader.read_file(path)
-        cpp_tree = parser.parse(code, path)
+        code = self._code_reader.read_file(path)
+        return self.create_header_file_from_code(code, path)
+
+    def create_header_file_from_code(self, code: str, path: pathlib.Path) -> str:
+        """Create a header for given C/C++ source code, which is stored in a given file.
+
+        The parser reads the file itself, therefore ValueError is raised if its contents differ
+        from the given code.
+
+        Headers are cached on disk, keyed by the source code, its file name, contents of local
+        headers it includes and by header_generator_digest().
+        """
+        if self._code_reader.read_file(path) != code:
+            raise ValueError('contents of "{}" differ from the given code'.format(path))
+        cache_path = self._header_cache_path(code, path) if self.use_cache else None
+        if cache_path is not None and cache_path.is_file():
+            _LOG.debug('using cached header file "%s" for "%s"', cache_path, path)
+            return self._code_reader.read_file(cache_path)
+        cpp_tree = self._parser.parse(code, path)
+        ast_generalizer = self._ast_generalizer_class({'path': path})
         tree = ast_generalizer.generalize(cpp_tree)
-        header_code = unparser.unparse(tree)
+        header_code = self._unparser.unparse(tree)
         _LOG.debug('unparsed raw header file: """%s"""', header_code)
+        if cache_path is None:
+            return header_code
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', dir=str(cache_path.parent), suffix='.partial',
+                                         delete=False) as partial_file:
+            partial_file.write(header_code)
+        os.replace(partial_file.name, str(cache_path))
         return header_code
 
     def _create_swig_interface(self, path: pathlib.Path) -> str:
         """Create a SWIG interface for a given C/C++ source code file."""
         module_name = path.with_suffix('').name
         header_code = self.create_header_file(path)
-        include_directives = []
-        function_signatures = []
-        for line in header_code.splitlines():
-            if line.startswith('#include'):
-                collection = include_directives
-            else:
-                collection = function_signatures
-            collection.append(line)
+        lines = header_code.splitlines()
+        is_include = [line.startswith('#include') for line in lines]
         swig_interface = SWIG_INTERFACE_TEMPLATE.format(
-            module_name=module_name, include_directives='\n'.join(include_directives),
-            function_signatures='\n'.join(function_signatures))
+            module_name=module_name,
+            include_directives='\n'.join(
+                line for line, include in zip(lines, is_include) if include),
+            function_signatures='\n'.join(
+                line for line, include in zip(lines, is_include) if not include))
         _LOG.debug('SWIG interface: """%s"""', swig_interface)
         return swig_interface
 
-    def create_swig_interface(self, path: pathlib.Path) -> str:
-        """Create a SWIG interface for a given C/C++ header file."""
-        module_name = path.with_suffix('').name
+    def create_swig_interface(self, *paths: pathlib.Path, module_name: str = None) -> str:
+        """Create a SWIG interface for given C/C++ header files.
+
+        If module name is not provided, it is derived from the name of the first header.
+        """
+        if module_name is None:
+            module_name = paths[0].with_suffix('').name
         swig_interface = SWIG_INTERFACE_TEMPLATE_HPP.format(
-            module_name=module_name, include_path=path)
+            module_name=module_name,
+            include_directives='\n'.join('#include "{}"'.format(path) for path in paths),
+            include_statements='\n'.join('%include "{}"'.format(path) for path in paths))
         _LOG.debug('SWIG interface: """%s"""', swig_interface)
         return swig_interface
 
@@ -152,47 +334,77 @@ class SwigCompiler(Compiler):
         swig_cmd = ['swig', '-I{}'.format(TRANSPYLE_CPP_RESOURCES_PATH),
                     '-python', *args, str(interface_path)]
         _LOG.info('running SWIG via %s', swig_cmd)
-        return run_tool(pathlib.Path(swig_cmd[0]), swig_cmd[1:])
+        return run_tool(pathlib.Path(swig_cmd[0]), swig_cmd[1:], capture_output=False)
 
 
 class CppSwigCompiler(SwigCompiler):
 
     """SWIG-based compiler for C++."""
 
-    def __init__(self):
-        super().__init__(Language.find('C++'))
+    wrapper_flags = ('-O1', '-fno-plt')
+    """Additional flags used when compiling the SWIG-generated wrapper.
+
+    The wrapper is glue code that gains nothing from aggressive optimization, so it is compiled
+    with a lower optimization level than the C++ source itself.
+    """
+
+    def __init__(self, use_cache: bool = True):
+        super().__init__(Language.find('C++'), use_cache)
         self.cpp_compiler = {'Linux': GppInterface(),
                              'Darwin': ClangppInterface()}[platform.system()]
 
     def compile(self, code: str, path: t.Optional[pathlib.Path] = None,
                 output_folder: t.Optional[pathlib.Path] = None, **kwargs) -> pathlib.Path:
+        return self.compile_many([(code, path)], output_folder, path.with_suffix('').name)
+
+    def compile_many(self, sources: t.Sequence[t.Tuple[str, pathlib.Path]],
+                     output_folder: t.Optional[pathlib.Path] = None,
+                     module_name: str = 'bundle') -> pathlib.Path:
+        """Compile many C++ source files into a single Python extension module.
+
+        All sources share one SWIG interface and one wrapper, which has to be compiled only once.
+        Return path to the Python module of the extension.
+        """
         if output_folder is None:
-            with tempfile.TemporaryDirectory() as tmpdir:
-                output_folder = pathlib.Path(tmpdir)
-            output_folder.mkdir()
-        header_code = self.create_header_file(path)
-        hpp_path = output_folder.joinpath(path.name).with_suffix('.hpp')
-        with hpp_path.open('w') as header_file:
-            header_file.write(header_code)
-        swig_interface = self.create_swig_interface(hpp_path.relative_to(output_folder))
-        cpp_path = output_folder.joinpath(path.name)
-        shutil.copy2(str(path), str(cpp_path))
-        swig_interface_path = output_folder.joinpath(path.with_suffix('.i').name)
-        with swig_interface_path.open('w') as swig_interface_file:
+            output_folder = pathlib.Path(tempfile.mkdtemp(prefix='transpyle_'))
+        paths = create_build_paths(output_folder, module_name, [path for _, path in sources])
+        header_codes = []
+        for (code, path), cpp_path, hpp_path in zip(sources, paths.cpp, paths.hpp):
+            if not output_folder.samefile(path.parent):
+                update_copy(code, cpp_path)
+            header_code = self.create_header_file_from_code(code, cpp_path)
+            with hpp_path.open('w') as header_file:
+                header_file.write(header_code)
+            header_codes.append(header_code)
+        swig_interface = self.create_swig_interface(
+            *[hpp_path.relative_to(output_folder) for hpp_path in paths.hpp],
+            module_name=module_name)
+        with paths.interface.open('w') as swig_interface_file:
             swig_interface_file.write(swig_interface)
-        wrapper_path = output_folder.joinpath(path.with_suffix('').name + '_wrap.cxx')
-
-        with temporarily_change_dir(output_folder):
-            try:
-                self.run_swig(swig_interface_path, '-c++')
-            except RuntimeError as err:
-                raise RuntimeError('Failed to create SWIG interface for "{}":\n'
-                                   'The header "{}" is:\n"""{}"""\nExamine folder "{}" for details'
-                                   .format(path, hpp_path, header_code, output_folder)) from err
-            result = self.cpp_compiler.compile(
-                None, input_paths=[cpp_path, wrapper_path],
-                output_path=cpp_path.with_name('_' + cpp_path.name).with_suffix('.so'))
-            assert result['results']['compile'].returncode == 0
-            assert result['results']['link'].returncode == 0
-
-        return cpp_path.with_suffix('.py')
+
+        try:
+            self.run_swig(
+                paths.interface, '-c++', '-I{}'.format(output_folder),
+                '-outdir', str(output_folder), '-o', str(paths.wrapper))
+        except RuntimeError as err:
+            headers = ''.join('The header "{}" is:\n"""{}"""\n'.format(hpp_path, header_code)
+                              for hpp_path, header_code in zip(paths.hpp, header_codes))
+            raise RuntimeError('Failed to create SWIG interface for {}:\n{}'
+                               'Examine folder "{}" for details'.format(
+                                   ', '.join('"{}"'.format(path) for _, path in sources),
+                                   headers, output_folder)) from err
+        wrapper_flags = self.wrapper_flags
+        input_env = {}
+        if isinstance(self.cpp_compiler, GppInterface):
+            pch_header_path = create_python_pch(self.cpp_compiler, wrapper_flags)
+            if pch_header_path is not None:
+                wrapper_flags = (*wrapper_flags, '-include', str(pch_header_path))
+                input_env[paths.wrapper] = CCACHE_PCH_ENV
+        result = self.cpp_compiler.compile(
+            None, None, output_folder, input_paths=[*paths.cpp, paths.wrapper],
+            input_flags={paths.wrapper: wrapper_flags}, input_env=input_env,
+            output_path=paths.library)
+        assert result['results']['compile'].returncode == 0
+        assert result['results']['link'].returncode == 0
+
+        return paths.module
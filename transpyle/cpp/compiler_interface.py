@@ -2,8 +2,13 @@
 
 import collections
 from distutils.sysconfig import get_python_inc, get_config_vars
+import functools
+import os
 import pathlib
 import platform
+import shutil
+import subprocess
+import tempfile
 import typing as t
 
 import numpy as np
@@ -17,6 +22,44 @@ PYTHON_CONFIG = get_config_vars()
 if platform.system() == 'Windows':
     PYTHON_CONFIG = collections.defaultdict(str, PYTHON_CONFIG.items())
 
+CCACHE_PATH = shutil.which('ccache')
+
+# ccache refuses to cache translation units using a precompiled header without this sloppiness,
+# which is set only when compiling such units to keep __DATE__ and __TIME__ correct elsewhere
+CCACHE_PCH_ENV = {'CCACHE_SLOPPINESS': ','.join([
+    *[_ for _ in os.environ.get('CCACHE_SLOPPINESS', '').split(',') if _],
+    'pch_defines', 'time_macros'])}
+
+FAST_LINKERS = collections.OrderedDict([('mold', 'mold'), ('lld', 'ld.lld')])
+"""Fast linkers in order of preference, mapped to names of their executables."""
+
+
+@functools.lru_cache()
+def fast_linker_flags(executable: pathlib.Path) -> t.Tuple[str, ...]:
+    """Select the first fast linker that the given compiler driver can actually use.
+
+    Having the linker on PATH is not enough, e.g. GCC accepts -fuse-ld=mold only since 12.1,
+    therefore a trivial shared library is linked to verify each candidate.
+    """
+    if platform.system() == 'Darwin':
+        return ()
+    for linker, linker_executable in FAST_LINKERS.items():
+        if shutil.which(linker_executable) is None:
+            continue
+        flag = '-fuse-ld={}'.format(linker)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            try:
+                result = subprocess.run(
+                    [str(executable), flag, '-shared', '-x', 'c', os.devnull,
+                     '-o', os.path.join(tmpdir, 'probe.so')],
+                    stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL)
+            except OSError:
+                return ()
+        if result.returncode == 0:
+            return (flag,)
+    return ()
+
 
 def split_and_strip(text: str) -> t.List[str]:
     return tuple([_.strip() for _ in text.split() if _.strip()])
@@ -33,11 +76,13 @@ class GppInterface(CompilerInterface):
         'MPI': pathlib.Path('mpic++')
     }
 
+    launcher = None if CCACHE_PATH is None else pathlib.Path(CCACHE_PATH)
+
     _flags = {
-        '': ('-O3', '-fPIC', '-Wall', '-Wextra', '-Wpedantic', '-fdiagnostics-color=always'),
+        '': ('-O3', '-fPIC', '-pipe', '-Wall', '-Wextra', '-Wpedantic',
+             '-fdiagnostics-color=always'),
         'compile': tuple(split_and_strip('{} {}'.format(
             PYTHON_CONFIG['BASECFLAGS'], PYTHON_CONFIG['BASECPPFLAGS']))),
-        'link': (),
         'OpenMP': ('-fopenmp',)
     }
     # -Ofast
@@ -64,6 +109,10 @@ class GppInterface(CompilerInterface):
         'link': [*['-L{}'.format(_) for _ in library_paths], *libraries]
     }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._flags = {**self._flags, 'link': fast_linker_flags(self.executable('link'))}
+
 
 class ClangppInterface(CompilerInterface):
 
@@ -73,8 +122,10 @@ class ClangppInterface(CompilerInterface):
 
     _executables = {'': pathlib.Path('clang++')}
 
+    launcher = None if CCACHE_PATH is None else pathlib.Path(CCACHE_PATH)
+
     _flags = {
-        '': ('-O3', '-fPIC', '-Wall', '-Wextra', '-Wpedantic', '-fcolor-diagnostics'),
+        '': ('-O3', '-fPIC', '-pipe', '-Wall', '-Wextra', '-Wpedantic', '-fcolor-diagnostics'),
         'compile': tuple(split_and_strip('{} {}'.format(
             PYTHON_CONFIG['BASECFLAGS'], PYTHON_CONFIG['BASECPPFLAGS']))),
         'OpenMP': ('-fopenmp',)
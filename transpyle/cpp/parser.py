@@ -15,6 +15,9 @@ _LOG = logging.getLogger(__name__)
 
 CASTXML_PATH = pathlib.Path('castxml')
 
+CASTXML_CC_GNU = {'Linux': 'g++', 'Darwin': 'clang++'}.get(platform.system())
+"""Compiler whose preprocessor and headers CastXML uses, if any."""
+
 
 def run_castxml(input_path: pathlib.Path, output_path: pathlib.Path, gcc: bool = False):
     """Run CastXML with given arguments."""
@@ -24,10 +27,8 @@ def run_castxml(input_path: pathlib.Path, output_path: pathlib.Path, gcc: bool =
         kwargs['castxml-gccxml'] = True
     else:
         kwargs['castxml-output=1'] = True
-    if platform.system() == 'Linux':
-        kwargs['castxml-cc-gnu'] = 'g++'
-    elif platform.system() == 'Darwin':
-        kwargs['castxml-cc-gnu'] = 'clang++'
+    if CASTXML_CC_GNU is not None:
+        kwargs['castxml-cc-gnu'] = CASTXML_CC_GNU
     kwargs['o'] = str(output_path)
     return run_tool(CASTXML_PATH, args, kwargs,
                     argunparser=argunparse.ArgumentUnparser(opt_value=' '))
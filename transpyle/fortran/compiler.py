@@ -33,9 +33,7 @@ class F2PyCompiler(Compiler):
         """Compile Fortran code using f2py."""
         # kwargs |= self.default_kwargs
         if output_folder is None:
-            with tempfile.TemporaryDirectory() as tmpdir:
-                output_folder = pathlib.Path(tmpdir)
-            output_folder.mkdir()
+            output_folder = pathlib.Path(tempfile.mkdtemp(prefix='transpyle_'))
 
         assert isinstance(code, str), type(code)
         assert isinstance(path, pathlib.Path), type(path)
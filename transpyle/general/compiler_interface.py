@@ -1,8 +1,11 @@
 """An interface to a standard compiler."""
 
+import concurrent.futures
 # import itertools
 import logging
+import os
 import pathlib
+import subprocess
 import typing as t
 
 from .tools import run_tool
@@ -51,6 +54,9 @@ class CompilerInterface(Compiler):
     The same rules apply for step naming as with executables.
     """
 
+    launcher = None  # type: t.Optional[pathlib.Path]
+    """Optional executable used to launch the compiler in the compile step, e.g. ccache."""
+
     def __init__(self, features: t.Set[str] = None, *args, **kwargs):
         assert all(_ not in self.step_names for _ in self._features), 'features and steps overlap'
         # assert all(_ not in self._features for _ in self.step_names)
@@ -62,6 +68,8 @@ class CompilerInterface(Compiler):
             if feature not in self._features:
                 raise ValueError('Feature "{}" is not supported by {}'.format(feature, self))
         self.features = features
+        self._step_flags = {}  # type: t.Dict[str, t.Tuple[str, ...]]
+        self._step_options = {}  # type: t.Dict[str, t.Tuple[str, ...]]
         _LOG.debug('initialized compiler interface %s with enabled features=%s', self, features)
 
     def _get_value(self, field, step_name) -> t.Any:
@@ -92,11 +100,17 @@ class CompilerInterface(Compiler):
                 list_ += field[step_faeture]
         return list_
 
-    def flags(self, step_name) -> t.List[str]:
-        return self._create_list(self._flags, step_name)
+    def flags(self, step_name) -> t.Tuple[str, ...]:
+        """Flags for a given step, computed once since features do not change after init."""
+        if step_name not in self._step_flags:
+            self._step_flags[step_name] = tuple(self._create_list(self._flags, step_name))
+        return self._step_flags[step_name]
 
-    def options(self, step_name):
-        return self._create_list(self._options, step_name)
+    def options(self, step_name) -> t.Tuple[str, ...]:
+        """Options for a given step, computed once since features do not change after init."""
+        if step_name not in self._step_options:
+            self._step_options[step_name] = tuple(self._create_list(self._options, step_name))
+        return self._step_options[step_name]
 
     def compile(self, code: str, path: t.Optional[pathlib.Path] = None,
                 output_folder: t.Optional[pathlib.Path] = None, **kwargs) -> pathlib.Path:
@@ -108,16 +122,77 @@ class CompilerInterface(Compiler):
             step_output = step(code, path, output_folder, **kwargs, **step_output)
         return step_output
 
-    def _compile(self, code, path, output_folder, input_paths: t.Sequence[pathlib.Path], **kwargs):
-        result = run_tool(self.executable('compile'), [
-            *self.flags('compile'), *self.options('compile'),
-            '-c', *[str(path) for path in input_paths]])
+    def run_compiler(self, args: t.Sequence[str], cwd: t.Optional[pathlib.Path] = None,
+                     env: t.Optional[t.Mapping[str, str]] = None) -> subprocess.CompletedProcess:
+        """Run the compile step executable (via the launcher, if any) with given arguments.
+
+        If env is given, these variables are set in addition to the current environment.
+        """
+        if self.launcher is None:
+            return run_tool(self.executable('compile'), args, cwd=cwd, capture_output=False,
+                            env=env)
+        return run_tool(self.launcher, [str(self.executable('compile')), *args], cwd=cwd,
+                        capture_output=False, env=env)
+
+    @staticmethod
+    def _object_path(input_path: pathlib.Path, output_folder: t.Optional[pathlib.Path]
+                     ) -> pathlib.Path:
+        if output_folder is None:
+            output_folder = pathlib.Path()
+        return output_folder.joinpath(input_path.with_suffix('.o').name)
+
+    def _compile_one(self, input_path: pathlib.Path, object_path: pathlib.Path,
+                     extra_flags: t.Sequence[str] = (),
+                     env: t.Optional[t.Mapping[str, str]] = None) -> subprocess.CompletedProcess:
+        return self.run_compiler([
+            *self.flags('compile'), *self.options('compile'), *extra_flags,
+            '-c', str(input_path), '-o', str(object_path)], env=env)
+
+    def _compile(self, code, path, output_folder, input_paths: t.Sequence[pathlib.Path],
+                 input_flags: t.Mapping[pathlib.Path, t.Sequence[str]] = None,
+                 input_env: t.Mapping[pathlib.Path, t.Mapping[str, str]] = None, **kwargs):
+        """Compile each of the input files into an object file.
+
+        Each translation unit is compiled by a separate process, and up to one process per CPU
+        runs at a time. Results are merged into a single completed process.
+
+        Input flags, if provided, map some of the input paths to additional flags used only
+        when compiling that particular file. Similarly, input environment, if provided, maps some
+        of the input paths to additional environment variables.
+
+        Relative input paths are relative to the output folder, if provided, or to the current
+        working directory otherwise. Object files are created in the same folder. Their paths
+        are passed explicitly, so that the compiler runs without changing working directory.
+        """
+        if input_flags is None:
+            input_flags = {}
+        if input_env is None:
+            input_env = {}
+        flags = [input_flags.get(input_path, ()) for input_path in input_paths]
+        envs = [input_env.get(input_path) for input_path in input_paths]
+        if output_folder is not None:
+            input_paths = [output_folder.joinpath(input_path) for input_path in input_paths]
+        object_paths = [self._object_path(input_path, output_folder)
+                        for input_path in input_paths]
+        max_workers = min(len(input_paths), os.cpu_count() or 1)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(
+                self._compile_one, input_paths, object_paths, flags, envs))
+        result = subprocess.CompletedProcess(
+            args=' && '.join(' '.join(result.args) for result in results),
+            returncode=max(result.returncode for result in results),
+            stdout=''.join(result.stdout for result in results if result.stdout),
+            stderr=''.join(result.stderr for result in results))
         return {'results': {'compile': result}}
 
     def _link(self, code, path, output_folder, input_paths: t.Sequence[pathlib.Path],
               output_path: pathlib.Path, **kwargs):
-        input_paths = [path.with_suffix('.o') for path in input_paths]
+        object_paths = [self._object_path(input_path, output_folder)
+                        for input_path in input_paths]
+        if output_folder is not None:
+            output_path = output_folder.joinpath(output_path)
         result = run_tool(self.executable('link'), [
             *self.flags('link'), *self.options('link'),
-            '-shared', *[str(path) for path in input_paths], '-o', str(output_path)])
+            '-shared', *[str(path) for path in object_paths], '-o', str(output_path)],
+            capture_output=False)
         return {'results': {'link': result, **kwargs['results']}}
@@ -1,11 +1,13 @@
 """For running external tools in a slightly isolated/failsafe manner."""
 
 import contextlib
+import functools
 import io
 import logging
 import os
 import pathlib
 import platform
+import shutil
 import subprocess
 import sys
 import tempfile
@@ -16,6 +18,16 @@ from colorama import Fore, Style
 
 _LOG = logging.getLogger(__name__)
 
+if sys.version_info < (3, 8):
+    _LOG.warning('Python %i.%i does not use posix_spawn() in subprocess, running external tools'
+                 ' will be slower', *sys.version_info[:2])
+
+
+@functools.lru_cache()
+def _which(executable_name: str, path: t.Optional[str]) -> t.Optional[str]:
+    """Find executable in given search path, memoized since tools are run repeatedly."""
+    return shutil.which(executable_name, path=path)
+
 
 def _postprocess_result(result: subprocess.CompletedProcess) -> None:
     if isinstance(result.stdout, bytes):
@@ -154,16 +166,33 @@ def redirect_stdout_and_stderr_via_fd(stdout, stderr):
 
 
 def run_tool(executable: pathlib.Path, args=(), kwargs=None, cwd: pathlib.Path = None,
-             argunparser: argunparse.ArgumentUnparser = None) -> subprocess.CompletedProcess:
-    """Run a given executable with given arguments."""
+             argunparser: argunparse.ArgumentUnparser = None, capture_output: bool = True,
+             env: t.Mapping[str, str] = None) -> subprocess.CompletedProcess:
+    """Run a given executable with given arguments.
+
+    If capture_output is False, stdout is discarded and only stderr is captured.
+
+    If env is given, these variables are set in addition to the current environment.
+    """
     if kwargs is None:
         kwargs = {}
     if argunparser is None:
         argunparser = argunparse.ArgumentUnparser()
     command = [str(executable)] + argunparser.unparse_options_and_args(kwargs, args, to_list=True)
-    run_kwargs = {'stdout': subprocess.PIPE, 'stderr': subprocess.PIPE}
-    if cwd is not None:
+    run_kwargs = {'stdout': subprocess.PIPE if capture_output else subprocess.DEVNULL,
+                  'stderr': subprocess.PIPE}
+    # subprocess uses posix_spawn() instead of fork() only if the executable path is absolute
+    # and there is no cwd and no closing of file descriptors (which are non-inheritable anyway)
+    if not executable.parent.parts:
+        executable_path = _which(str(executable), os.environ.get('PATH'))
+        if executable_path is not None:
+            run_kwargs['executable'] = executable_path
+    if cwd is None:
+        run_kwargs['close_fds'] = False
+    else:
         run_kwargs['cwd'] = str(cwd)
+    if env is not None:
+        run_kwargs['env'] = {**os.environ, **env}
     _LOG.debug('running tool %s ...', command)
     result = subprocess.run(command, **run_kwargs)
     _LOG.debug('return code of "%s" tool: %s', executable, result)
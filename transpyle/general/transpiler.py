@@ -46,11 +46,7 @@ class Transpiler(Registry):
             # TODO: this leaves garbage behind in /tmp/ but is neeeded by some transpiler passes
             translated_path = pathlib.Path(translated_file.name)
 
-        compile_folder = None
-        with tempfile.TemporaryDirectory() as compile_dir_name:
-            compile_folder = pathlib.Path(compile_dir_name)
-        if not compile_folder.is_dir():
-            compile_folder.mkdir()
+        compile_folder = pathlib.Path(tempfile.mkdtemp(prefix='transpyle_'))
 
         return self.transpile(code, path, translated_path, compile_folder)
 